@@ -1,313 +1,568 @@
 import os
+import re
 import sys
-import json
+import hashlib
+import sqlite3
+import contextlib
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import fitz  # PyMuPDF
-from crewai import Agent, Task, Process, Crew
+import orjson
+
+# fitz (PyMuPDF), crewai and openai are imported where they're used so the CLI starts fast
+# and the usage/help paths never pay for them.
+
+
+OLLAMA_MODEL = "mistral"
+
+
+def configure_llm():
+    os.environ["OPENAI_API_BASE"] = "http://localhost:11434/v1"
+    os.environ["OPENAI_API_KEY"] = "ollama"
+    os.environ["OPENAI_MODEL_NAME"] = OLLAMA_MODEL
 
-os.environ["OPENAI_API_BASE"] = "http://localhost:11434/v1"
-os.environ["OPENAI_API_KEY"] = "ollama"
-os.environ["OPENAI_MODEL_NAME"] = "mistral"
 
 BASE_DIR = Path(__file__).resolve().parent
 output_path = BASE_DIR / "echo_output.json"
+jsonl_path = output_path.with_suffix(".jsonl")
+# pages written to the JSONL stream between flushes
+FLUSH_EVERY = 8
+cache_path = BASE_DIR / "echo_cache.sqlite"
+# number of pages analysed concurrently against the local Ollama server
+ECHO_CONCURRENCY = max(1, int(os.environ.get("ECHO_CONCURRENCY", "4")))
+# pages analysed together in one prompt; 4 passages of a typical novel page stay well inside mistral's 8k context
+ECHO_BATCH_SIZE = max(1, int(os.environ.get("ECHO_BATCH_SIZE", "4")))
+# pages pulled from the PDF ahead of the pool, so parsing never runs far ahead of analysis
+PAGE_PREFETCH = ECHO_BATCH_SIZE * ECHO_CONCURRENCY
+
+
+def iter_pdf_pages(pdf_path: str):
+    import fitz  # PyMuPDF
+
+    # ligatures are expanded to plain letters and text outside the page box is dropped
+    flags = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+    # one page of text at a time from a single document handle, closed when the generator finishes
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            yield page.get_text("text", flags=flags)
+
+
+# ============ LLM (OLLAMA, STREAMING) ============
+class JsonCloseDetector:
+    # tracks {}/[] nesting outside string literals; done once the first top-level value of the answer closes.
+    # crewai agents reply "Thought: ...\nFinal Answer: {...}", so counting starts after "Final Answer:"
+    # (or straight away when the reply opens with the JSON itself) and brackets in the thought are ignored.
+    FINAL_ANSWER = "Final Answer:"
+    _LEADING_FENCE_RE = re.compile(r"^```(?:json)?\s*")
+
+    def __init__(self):
+        self.armed = False
+        self.pending = ""
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, piece: str) -> bool:
+        if not self.armed:
+            self.pending += piece
+            idx = self.pending.find(self.FINAL_ANSWER)
+            if idx != -1:
+                piece = self.pending[idx + len(self.FINAL_ANSWER):]
+            else:
+                head = self._LEADING_FENCE_RE.sub("", self.pending.lstrip())
+                if head[:1] not in ("{", "["):
+                    return False
+                piece = head
+            self.armed = True
+            self.pending = ""
+
+        for ch in piece:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"' and self.started:
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+                self.started = True
+            elif ch in "}]" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
+
+@functools.cache
+def streaming_ollama_llm_class():
+    from crewai.llms.base_llm import BaseLLM
+    from openai import OpenAI
+
+    class StreamingOllamaLLM(BaseLLM):
+        # Streams from Ollama's OpenAI-compatible endpoint and closes the connection as soon as the
+        # JSON answer is balanced, so the model isn't left decoding "Here you go!"-style suffixes.
+        def __init__(self, model: str, base_url: str, api_key: str, **kwargs):
+            super().__init__(model=model, base_url=base_url, api_key=api_key, **kwargs)
+            self.client = OpenAI(base_url=base_url, api_key=api_key)
+
+        def call(
+            self,
+            messages,
+            tools=None,
+            callbacks=None,
+            available_functions=None,
+            from_task=None,
+            from_agent=None,
+            response_model=None,
+            **kwargs,
+        ):
+            if isinstance(messages, str):
+                messages = [{"role": "user", "content": messages}]
+
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                stop=getattr(self, "stop", None) or None,
+                stream=True,
+            )
+            detector = JsonCloseDetector()
+            parts = []
+            try:
+                for chunk in response:
+                    piece = chunk.choices[0].delta.content if chunk.choices else None
+                    if not piece:
+                        continue
+                    parts.append(piece)
+                    if detector.feed(piece):
+                        break
+            finally:
+                response.close()
+            return "".join(parts)
+
+        def supports_function_calling(self) -> bool:
+            return False
+
+        def supports_stop_words(self) -> bool:
+            return True
+
+        def get_context_window_size(self) -> int:
+            return 8192
+
+    return StreamingOllamaLLM
+
+
+@functools.cache
+def get_echo_llm():
+    # stateless apart from the HTTP client, so one instance serves every worker thread
+    configure_llm()
+    return streaming_ollama_llm_class()(
+        model=os.environ["OPENAI_MODEL_NAME"],
+        base_url=os.environ["OPENAI_API_BASE"],
+        api_key=os.environ["OPENAI_API_KEY"],
+    )
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    doc = fitz.open(pdf_path)
-    return "\n".join(page.get_text() for page in doc)
+# ============ AGENTS (ECHO) ============
+# A single agent produces the final JSON in one LLM round-trip; the separate
+# setting/ambience/emotion/formatter/corrector hops were each a full call.
+# crewai agents are not thread-safe: execute_task stores its executor (and message history) on the
+# agent, so concurrent kickoffs sharing one agent can swap executors mid-call. Build one per thread.
+def build_echo_agent():
+    from crewai import Agent
+
+    return Agent(
+        role="Literary Soundscape Analyst",
+        goal=(
+            "Identify the setting, audible ambience, emotional tone and genre of a passage of narrative text "
+            "and report them as a single clean JSON object."
+        ),
+        backstory=(
+            "You specialise in reading prose and spotting where the scene is happening, what the reader could reasonably hear in it, "
+            "and whether it is tense, warm, fearful, mysterious, or romantic. "
+            "You stay faithful to the text and do not make up details that aren't there."
+        ),
+        llm=get_echo_llm(),
+        verbose=True,
+        allow_delegation=False,
+    )
 
 
-# ============ AGENTS (ECHO) ============
-SettingAgent = Agent(
-    role="Literary Setting Analyst",
-    goal=(
-        "Identify and describe locations and broader settings found in narrative or literary text."
-    ),
-    backstory=(
-        "You specialise in reading prose and spotting where the scene is happening — specific places and the general type of place. "
-        "You stay faithful to the text."
-    ),
-    verbose=True,
-    allow_delegation=False,
-)
+# Task descriptions are fixed templates with the page text interpolated at the very end, so the
+# prompt prefix is byte-identical across pages and Ollama's prompt cache can reuse it.
+# The {placeholders} are filled by crewai from kickoff(inputs=...).
+ECHO_TASK_DESCRIPTION = """Analyse the text below and describe it as a generalised soundscape.
 
-AmbienceAgent = Agent(
-    role="Ambient Detail Extractor",
-    goal=(
-        "Detect environmental or background elements mentioned in text that could correspond to audible ambience (weather, crowds, vehicles, natural sounds)."
-    ),
-    backstory=(
-        "You focus on what the reader could reasonably hear in the scene, based only on what the text actually says."
-    ),
-    verbose=True,
-    allow_delegation=False,
-)
+1. Setting: pick the single dominant scene.
+   location: short tag (max 4 words) for the specific place, e.g. "hut_on_rock", "coastal_hut", "city_hotel_room", "forest_path", or "unknown".
+   environment: broad ambience category (max 5 words) that could drive a soundscape, e.g. "stormy_coast", "rainy_city", "quiet_interior", "windy_seaside", "crowded_inn", or "unknown".
+   Prefer outdoor/ambiently rich descriptions over literal narrative sentences. Do not output long sentences or multiple locations.
 
-EmotionAgent = Agent(
-    role="Narrative Emotion Profiler",
-    goal=(
-        "Identify clear emotional tones and, when obvious, story genres present in a passage of narrative text."
-    ),
-    backstory=(
-        "You are good at noticing when a scene is tense, warm, fearful, mysterious, or romantic, but you do not make up emotions that aren't there."
-    ),
-    verbose=True,
-    allow_delegation=False,
-)
+2. Ambient sounds: background or environmental sounds implied or explicitly mentioned in the text (e.g. rain, wind, waves, city traffic, bar chatter). Empty list if none.
 
-EchoFormatter = Agent(
-    role="Literary JSON Formatter",
-    goal=(
-        "Format structured literary content into a clean JSON object for downstream use."
-    ),
-    backstory=(
-        "You're a formatting specialist whose role is to convert structured literature content into clean, well-labelled JSON for a reading/sound system. "
-        "You do not analyse or add interpretation — you just format."
-    ),
-    verbose=False,
-    allow_delegation=False,
-)
+3. Emotions and genres: emotional tones and genre cues supported by the text. Empty lists if none.
+
+Output ONLY:
+
+{
+  "setting": {
+    "location": "...",
+    "environment": "..."
+  },
+  "ambient_sounds": [...],
+  "emotions": [...],
+  "genre_candidates": [...]
+}
+
+Respond only with the JSON object.
+No extra text, no headings, no markdown, no code fences. Answer must start with '{' and end with '}'.
 
-EchoStructureCorrector = Agent(
-    role="Echo JSON Structure Corrector",
-    goal="Ensure the final Echo output is a single valid JSON object without markdown or code fences.",
-    backstory=(
-        "You receive model output that should be JSON. You remove ```json ... ``` wrappers, extra text, and keep only the JSON object "
-        "with the keys produced by upstream agents."
-    ),
-    verbose=False,
-    allow_delegation=False,
+Text: {page_text}
+"""
+
+ECHO_EXPECTED_OUTPUT = (
+    "JSON object with keys: setting (with location, environment), ambient_sounds, emotions, genre_candidates. "
+    "No markdown, no explanation."
 )
 
+BATCH_TASK_DESCRIPTION = """Describe each of the numbered passages below as a generalised soundscape.
 
-def build_tasks(page_text: str):
-    # Task 1: Extract setting (labelled plain text, no JSON)
-    setting_task = Task(
-        description=f"""Identify the setting in the text and express it as a generalised soundscape.
+For every passage:
+1. Setting: pick the single dominant scene.
+   location: short tag (max 4 words) for the specific place, e.g. "hut_on_rock", "coastal_hut", "city_hotel_room", "forest_path", or "unknown".
+   environment: broad ambience category (max 5 words) that could drive a soundscape, e.g. "stormy_coast", "rainy_city", "quiet_interior", "windy_seaside", "crowded_inn", or "unknown".
+2. Ambient sounds: background or environmental sounds implied or explicitly mentioned in that passage. Empty list if none.
+3. Emotions and genres: emotional tones and genre cues supported by that passage. Empty lists if none.
 
-Output two labelled lines only:
-setting_location: short tag (max 4 words) for the specific place, e.g. "hut_on_rock", "coastal_hut", "city_hotel_room", "forest_path", or "unknown".
-setting_environment: broad ambience category (max 5 words) that could drive a soundscape, e.g. "stormy_coast", "rainy_city", "quiet_interior", "windy_seaside", "crowded_inn", or "unknown".
+Output ONLY a JSON array with one object per passage, in passage order:
 
-Prefer outdoor/ambiently rich descriptions over literal narrative sentences. Do not output long sentences or multiple locations. Pick the single dominant scene.
+[
+  {
+    "setting": {
+      "location": "...",
+      "environment": "..."
+    },
+    "ambient_sounds": [...],
+    "emotions": [...],
+    "genre_candidates": [...]
+  }
+]
 
-Text: {page_text}
+Respond only with the JSON array.
+No extra text, no headings, no markdown, no code fences. Answer must start with '[' and end with ']'.
 
-Your answer must contain only the two labelled lines shown.
-Any additional text, explanation, or commentary will make the answer invalid.
-""",
-        agent=SettingAgent,
-        expected_output="setting_location: ...\nsetting_environment: ..."
-    )
+Number of passages: {count}
+
+{passages}
+"""
 
-    # Task 2: Extract ambience (labelled plain text, no JSON)
-    ambience_task = Task(
-        description=f"""Extract background or environmental sounds implied or explicitly mentioned in the text. Output one labelled line:
+BATCH_EXPECTED_OUTPUT = (
+    "JSON array of {count} objects with keys: setting (with location, environment), ambient_sounds, "
+    "emotions, genre_candidates. No markdown, no explanation."
+)
 
-ambient_sounds: comma-separated list of sounds (e.g. rain, wind, waves, city traffic, bar chatter). If none, write: ambient_sounds: 
 
-Text: {page_text}
+# Crews are built once per worker thread and reused for every page; kickoff() mutates task and agent
+# state, so neither can be shared across the pool. Each thread's crews share that thread's agent;
+# the LLM client is shared process-wide.
+_thread_crews = threading.local()
 
-Your answer must contain only one line beginning with 'ambient_sounds:'.
-Any additional text, sentences, or commentary make the answer invalid.
-""",
-        agent=AmbienceAgent,
-        expected_output="ambient_sounds: ...",
+
+def _build_crew(agent, description: str, expected_output: str):
+    from crewai import Crew, Process, Task
+
+    return Crew(
+        agents=[agent],
+        tasks=[Task(description=description, agent=agent, expected_output=expected_output)],
+        process=Process.sequential,
+        verbose=True,
     )
 
-    # Task 3: Extract emotions / genre hints (labelled plain text, no JSON)
-    emotion_task = Task(
-        description=f"""Identify emotional tones and genre cues in the text. Output exactly two lines:
 
-emotions: comma-separated emotions present, or empty if none.
-genre_candidates: comma-separated genres present, or empty if none.
+def get_crew(name: str):
+    if not hasattr(_thread_crews, "agent"):
+        _thread_crews.agent = build_echo_agent()
+        _thread_crews.echo = _build_crew(_thread_crews.agent, ECHO_TASK_DESCRIPTION, ECHO_EXPECTED_OUTPUT)
+        _thread_crews.batch = _build_crew(_thread_crews.agent, BATCH_TASK_DESCRIPTION, BATCH_EXPECTED_OUTPUT)
+    return getattr(_thread_crews, name)
 
-Include only emotions and genres supported by the text. Do not add commentary.
 
-Text: {page_text}
+# ============ PAGE CACHE ============
+# Keyed on normalised page text so re-runs (and repeated boilerplate pages) skip the crew entirely.
+# The prompts and model are folded into the key, so editing either retires old entries.
+CACHE_VERSION = hashlib.blake2b(
+    "\0".join((OLLAMA_MODEL, ECHO_TASK_DESCRIPTION, BATCH_TASK_DESCRIPTION)).encode("utf-8"), digest_size=8
+).digest()
 
-Your answer must contain only the two labelled lines shown.
-Do not include introductions, explanations, or commentary of any kind.
-""",
-        agent=EmotionAgent,
-        context=[setting_task, ambience_task],
-        expected_output="emotions: ...\ngenre_candidates: ...",
-    )
 
-    # Task 4: Convert labelled ECHO fields into final JSON
-    structure_task = Task(
-        description="""
-Build a JSON object from the previous labelled outputs.
+def normalise_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
 
-Output ONLY:
 
-{
-  "setting": {
-    "location": "...",
-    "environment": "..."
-  },
-  "ambient_sounds": [...],
-  "emotions": [...],
-  "genre_candidates": [...]
-}
+def page_signature(text: str) -> bytes:
+    return hashlib.blake2b(normalise_text(text).encode("utf-8"), digest_size=16).digest()
 
-Rules:
-- No extra text, no headings, no markdown, no code fences.
-- If a field is missing, omit it.
-- Convert comma-separated values to JSON arrays.
-- Answer must start with '{' and end with '}'.
-""",
-        agent=EchoFormatter,
-        context=[setting_task, ambience_task, emotion_task],
-        expected_output=(
-            "JSON object with keys: setting (with location, environment), ambient_sounds, emotions, genre_candidates. "
-            "No markdown, no explanation."
-        ),
-    )
 
-    echo_structure_task = Task(
-        description="""
-Ensure the previous output is ONLY a JSON object with these keys:
-- setting (with location, environment)
-- ambient_sounds (array)
-- emotions (array)
-- genre_candidates (array)
-
-If it already is valid JSON, return it unchanged.
-If there are code fences or text before/after, remove them.
-Do NOT add explanations or extra text.
-Output must start with '{' and end with '}'.
-""",
-        agent=EchoStructureCorrector,
-        context=[structure_task],
-        expected_output="""{
-  "setting": {
-    "location": "generic_interior",
-    "environment": "neutral"
-  },
-  "ambient_sounds": [],
-  "emotions": [],
-  "genre_candidates": []
-}"""
-    )
+def _cache_key(text: str) -> str:
+    return (CACHE_VERSION + page_signature(text)).hex()
 
-    return setting_task, ambience_task, emotion_task, structure_task, echo_structure_task
 
+@contextlib.contextmanager
+def _cache_connect():
+    # a short-lived connection per lookup/store; "with conn" only commits, so close explicitly
+    with contextlib.closing(sqlite3.connect(cache_path)) as conn, conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS echo_cache (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+        yield conn
 
-def run_echo_on_text(text: str):
-    setting_task, ambience_task, emotion_task, structure_task, echo_structure_task = build_tasks(text)
 
-    crew = Crew(
-        agents=[SettingAgent, AmbienceAgent, EmotionAgent, EchoFormatter, EchoStructureCorrector],
-        tasks=[setting_task, ambience_task, emotion_task, structure_task, echo_structure_task],
-        process=Process.sequential,
-        verbose=True,
+def _cache_get(text: str):
+    with _cache_connect() as conn:
+        row = conn.execute("SELECT result FROM echo_cache WHERE key = ?", (_cache_key(text),)).fetchone()
+    return row[0] if row is not None else None
+
+
+def _cache_put(text: str, result: str):
+    with _cache_connect() as conn:
+        conn.execute("INSERT OR REPLACE INTO echo_cache (key, result) VALUES (?, ?)", (_cache_key(text), result))
+
+
+def cached_echo(func):
+    @functools.wraps(func)
+    def wrapper(text: str):
+        cached = _cache_get(text)
+        if cached is not None:
+            return cached
+
+        result = func(text)
+        # don't pin a bad generation: only results that decode to an analysis are stored
+        if "raw" not in parse_echo_result(result):
+            _cache_put(text, result)
+        return result
+
+    return wrapper
+
+
+# ============ PARSING ============
+# Greedy first-'{' to last-'}' (or '[' to ']') match: drops code fences and prose around the payload.
+_JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+
+def clean_model_output(text: str, pattern=_JSON_RE) -> str:
+    # deterministic stand-in for an LLM "structure corrector": drop ```json fences, keep the JSON payload
+    text = text.strip()
+    text = re.sub(r"^```(?:json)?\s*", "", text)
+    text = re.sub(r"\s*```$", "", text)
+    match = pattern.search(text)
+    return match.group(0) if match else text
+
+
+_LIST_FIELDS = ("ambient_sounds", "emotions", "genre_candidates")
+
+
+def is_echo_result(parsed) -> bool:
+    # the carry-forward pass calls setting.get(...) and treats the other fields as lists
+    return (
+        isinstance(parsed, dict)
+        and isinstance(parsed.get("setting") or {}, dict)
+        and all(isinstance(parsed.get(field) or [], list) for field in _LIST_FIELDS)
     )
 
-    result = crew.kickoff()
+
+def parse_echo_result(result: str) -> dict:
+    match = _JSON_RE.search(result)
+    if match is None:
+        return {"raw": result}
+    try:
+        parsed = orjson.loads(match.group(0))
+    except orjson.JSONDecodeError:
+        return {"raw": result}
+    return parsed if is_echo_result(parsed) else {"raw": result}
+
+
+# ============ TRIVIAL PAGES ============
+# Title, blank, copyright and bare chapter-heading pages carry no scene; they get an empty
+# result without touching the LLM and the carry-forward pass fills them from the previous page.
+MIN_PAGE_CHARS = 80
+# a heading plus title and no sentence punctuation, e.g. "CHAPTER XII The Lighthouse Keeper"
+_HEADING_RE = re.compile(r"^(?:chapter|part|book|prologue|epilogue)\b[^.!?]{0,120}$", re.IGNORECASE)
+
+
+def is_trivial_page(text: str) -> bool:
+    stripped = re.sub(r"\s+", " ", text).strip()
+    return len(stripped) < MIN_PAGE_CHARS or bool(_HEADING_RE.match(stripped))
+
+
+def _empty_result() -> dict:
+    return {
+        "setting": {"location": "unknown", "environment": "unknown"},
+        "ambient_sounds": [],
+        "emotions": [],
+        "genre_candidates": [],
+    }
+
+
+def _kickoff(name: str, inputs: dict) -> str:
+    result = get_crew(name).kickoff(inputs=inputs)
     # crew.kickoff() returns a CrewOutput; get the raw string
-    final_text = getattr(result, "raw", str(result))
-    return final_text
+    return getattr(result, "raw", str(result))
+
+
+@cached_echo
+def run_echo_on_text(text: str):
+    return clean_model_output(_kickoff("echo", {"page_text": text}))
+
+
+def run_echo_on_batch(pages: list[str]) -> list[dict]:
+    results = [None] * len(pages)
+    for i, page_text in enumerate(pages):
+        if is_trivial_page(page_text):
+            results[i] = _empty_result()
+            continue
+        cached = _cache_get(page_text)
+        if cached is not None:
+            results[i] = parse_echo_result(cached)
+    missing = [i for i, parsed in enumerate(results) if parsed is None]
+
+    if len(missing) > 1:
+        passages = "\n\n".join(f"Passage {n}:\n{pages[i]}" for n, i in enumerate(missing, start=1))
+        final_text = clean_model_output(_kickoff("batch", {"count": len(missing), "passages": passages}), _JSON_ARRAY_RE)
+        try:
+            batch = orjson.loads(final_text)
+        except orjson.JSONDecodeError:
+            batch = None
+
+        if isinstance(batch, list) and len(batch) == len(missing) and all(is_echo_result(p) for p in batch):
+            for i, parsed in zip(missing, batch):
+                _cache_put(pages[i], orjson.dumps(parsed).decode())
+                results[i] = parsed
+            return results
+
+    # single page left, or the model didn't return one well-formed object per passage: fall back to per-page calls
+    for i in missing:
+        results[i] = parse_echo_result(run_echo_on_text(pages[i]))
+    return results
+
+
+# ============ OUTPUT ============
+def jsonl_to_json(src: Path, dest: Path):
+    # one pass, one page in memory at a time; indenting each item by two more spaces matches OPT_INDENT_2 on the list
+    with open(src, "rb") as fin, open(dest, "wb") as fout:
+        fout.write(b"[")
+        for n, line in enumerate(fin):
+            item = orjson.dumps(orjson.loads(line), option=orjson.OPT_INDENT_2).replace(b"\n", b"\n  ")
+            fout.write((b",\n  " if n else b"\n  ") + item)
+        fout.write(b"\n]" if fout.tell() > 1 else b"]")
 
 
 if __name__ == "__main__":
     # usage:
-    #   python Echo.py path/to/book.pdf
+    #   python Echo.py path/to/book.pdf [--verbose]
     # or:
     #   python Echo.py "some raw text to analyse"
-    if len(sys.argv) < 2:
+    if any(a in ("-h", "--help") for a in sys.argv[1:]):
+        print("usage: python echo.py <book.pdf | \"raw text\"> [--verbose]")
+        sys.exit(0)
+
+    args = [a for a in sys.argv[1:] if a != "--verbose"]
+    verbose = len(args) != len(sys.argv) - 1
+    if not args:
         print("❌ Please provide a PDF path or some raw text.")
         sys.exit(1)
 
-    arg = sys.argv[1]
+    arg = args[0]
 
     # If it's a file
     if Path(arg).exists() and arg.lower().endswith(".pdf"):
-        # PDF branch: extract pages, run echo per page, output list of page-level JSONs
-        def extract_pages_from_pdf(pdf_path):
-            doc = fitz.open(pdf_path)
-            return [page.get_text() for page in doc]
-
-        pages = extract_pages_from_pdf(arg)
-        page_outputs = []
+        # PDF branch: stream pages, run echo per page, write one JSON line per page as results arrive
+        pages = iter_pdf_pages(arg)
+        pidx = 0
         last_setting = None
         last_ambient = None
         last_emotions = None
         last_genres = None
 
-        for pidx, page_text in enumerate(pages, start=1):
-            result = run_echo_on_text(page_text)
-            try:
-                parsed = json.loads(result)
-            except json.JSONDecodeError:
-                page_outputs.append({"page": pidx, "raw": result})
-                continue
-
-            # normalise missing sections
-            setting = parsed.get("setting") or {}
-            ambient = parsed.get("ambient_sounds") or []
-            emotions = parsed.get("emotions") or []
-            genres = parsed.get("genre_candidates") or []
-
-            # if this page didn't give us a good setting but we have a previous one, carry it forward
-            loc = setting.get("location") or ""
-            env = setting.get("environment") or ""
-            setting_too_generic = env in ("unknown", "neutral", "")
-
-            if setting_too_generic and last_setting is not None:
-                setting = last_setting
-            else:
-                # update last_setting only when this page actually had something concrete
-                if env not in ("unknown", "neutral", ""):
-                    last_setting = setting
-
-            # carry forward ambience if empty
-            if (not ambient) and (last_ambient is not None):
-                ambient = last_ambient
-            else:
-                if ambient:
-                    last_ambient = ambient
-
-            # carry forward emotions if empty
-            if (not emotions) and (last_emotions is not None):
-                emotions = last_emotions
-            else:
-                if emotions:
-                    last_emotions = emotions
-
-            # carry forward genres if empty
-            if (not genres) and (last_genres is not None):
-                genres = last_genres
-            else:
-                if genres:
-                    last_genres = genres
-
-            parsed["setting"] = setting
-            parsed["ambient_sounds"] = ambient
-            parsed["emotions"] = emotions
-            parsed["genre_candidates"] = genres
-            parsed["page"] = pidx
-
-            page_outputs.append(parsed)
-
-        with open(output_path, "w") as f:
-            json.dump(page_outputs, f, indent=2)
-        print("✅ ECHO per-page analysis written to", output_path)
-        print(json.dumps(page_outputs, indent=2))
+        # fan out batched crew calls (I/O bound on Ollama) in bounded chunks, keeping results in page order;
+        # carry-forward depends on the previous page, so normalisation stays serial in the consumer
+        with ThreadPoolExecutor(max_workers=ECHO_CONCURRENCY) as pool, open(jsonl_path, "wb") as out:
+            while chunk := list(itertools.islice(pages, PAGE_PREFETCH)):
+                # identical pages (blanks, running headers, repeated notices) are analysed once per chunk
+                sigs = [page_signature(page_text) for page_text in chunk]
+                unique = dict(zip(sigs, chunk))
+                unique_texts = list(unique.values())
+                batches = [unique_texts[i:i + ECHO_BATCH_SIZE] for i in range(0, len(unique_texts), ECHO_BATCH_SIZE)]
+                by_sig = dict(zip(unique, itertools.chain.from_iterable(pool.map(run_echo_on_batch, batches))))
+                for parsed in (by_sig[sig] for sig in sigs):
+                    pidx += 1
+                    if "raw" in parsed:
+                        page_output = {"page": pidx, "raw": parsed["raw"]}
+                    else:
+                        # normalise missing sections
+                        setting = parsed.get("setting") or {}
+                        ambient = parsed.get("ambient_sounds") or []
+                        emotions = parsed.get("emotions") or []
+                        genres = parsed.get("genre_candidates") or []
+
+                        # if this page didn't give us a good setting but we have a previous one, carry it forward;
+                        # update last_setting only when this page actually had something concrete
+                        env = setting.get("environment") or ""
+                        if env not in ("unknown", "neutral", ""):
+                            last_setting = setting
+                        elif last_setting is not None:
+                            setting = last_setting
+
+                        # carry forward ambience / emotions / genres if empty
+                        if ambient:
+                            last_ambient = ambient
+                        elif last_ambient is not None:
+                            ambient = last_ambient
+
+                        if emotions:
+                            last_emotions = emotions
+                        elif last_emotions is not None:
+                            emotions = last_emotions
+
+                        if genres:
+                            last_genres = genres
+                        elif last_genres is not None:
+                            genres = last_genres
+
+                        page_output = {
+                            "page": pidx,
+                            "setting": setting,
+                            "ambient_sounds": ambient,
+                            "emotions": emotions,
+                            "genre_candidates": genres,
+                        }
+
+                    out.write(orjson.dumps(page_output) + b"\n")
+                    if verbose:
+                        print(orjson.dumps(page_output, option=orjson.OPT_INDENT_2).decode())
+                    if pidx % FLUSH_EVERY == 0:
+                        out.flush()
+
+        jsonl_to_json(jsonl_path, output_path)
+        print("✅ ECHO per-page analysis written to", output_path, "and", jsonl_path)
     else:
         # treat it as raw text
         text = arg
 
         analysis_result = run_echo_on_text(text)
 
-        try:
-            parsed = json.loads(analysis_result)
-            with open(output_path, "w") as f:
-                json.dump(parsed, f, indent=2)
+        parsed = parse_echo_result(analysis_result)
+        if "raw" not in parsed:
+            output = orjson.dumps(parsed, option=orjson.OPT_INDENT_2)
+            with open(output_path, "wb") as f:
+                f.write(output)
             print("✅ ECHO analysis written to", output_path)
-            print(json.dumps(parsed, indent=2))
-        except json.JSONDecodeError:
+            print(output.decode())
+        else:
             # fall back to raw text
             with open(output_path, "w") as f:
                 f.write(analysis_result)